@@ -0,0 +1,214 @@
+# batch_scoring.py
+# Job batch (nocturne) : profil, cluster, risk_level, parcours et recommandations
+# pour toute la population OULAD
+# Entrée : CSV OULAD (ou dataset partagé publié par shared_dataset.py)
+# Sortie : fichiers par chunk (Parquet si pyarrow disponible, sinon CSV) + checkpoint
+#
+# Usage (depuis agents/) :
+#   python batch_scoring.py --data ../data/oulad/ --out ../output/cohort --workers 8
+#   python batch_scoring.py --shared-dir /dev/shm/oulad --out ../output/cohort   # workers attachés en mmap
+#
+# Reprise : un chunk terminé est écrit atomiquement (fichier .tmp puis rename) ;
+# relancer la même commande ne retraite que les chunks manquants.
+
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import multiprocessing as mp
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from dataloader import OULADDataLoader
+from profiling_agent import ProfilingAgent
+from path_planning_agent import PathPlanningAgent
+from recommendation_agent import RecommendationAgent
+from shared_dataset import attach, publish
+
+CHECKPOINT = "_checkpoint.json"
+
+# Agents du process courant : hérités par fork, ou reconstruits par _init_worker
+_agents = None
+
+
+def _build_agents(data, precomputed=None):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return {
+            "profiling": ProfilingAgent(data, precomputed=precomputed),
+            "planning": PathPlanningAgent(data),
+            "recommendation": RecommendationAgent(data),
+        }
+
+
+def _init_worker(shared_dir):
+    """ Initialiseur du pool : rien à faire si les agents sont hérités du parent (fork) """
+    global _agents
+    if _agents is None:
+        with contextlib.redirect_stdout(io.StringIO()):
+            data, precomputed = attach(shared_dir)
+        _agents = _build_agents(data, precomputed)
+
+
+# --------------------------------------------------
+# Traitement d'un étudiant / d'un chunk
+# --------------------------------------------------
+def score_student(agents, student_id):
+    profile = agents["profiling"].profile_student({"student_type": "existing", "student_id": student_id})
+    if "error" in profile:
+        return {"student_id": int(student_id), "error": profile["error"]}
+
+    planning = agents["planning"].plan_path(profile, save_image=False)
+    recs = agents["recommendation"].recommend(profile, planning["planned_path"])
+    schedule = planning["schedule"]
+    selected = schedule["selected_index"]
+
+    return {
+        "student_id": int(student_id),
+        "error": None,
+        "cluster_id": profile["cluster_id"],
+        "risk_level": profile["risk_level"],
+        "mean_score": float(profile["mean_score"]),
+        "total_clicks": profile["total_clicks"],
+        "learning_style": profile["learning_style"],
+        "start_module": planning["start_module_used"],
+        "planned_path": "|".join(planning["planned_path"]),
+        "path_length": planning["path_length"],
+        "schedule_presentations": (
+            "|".join(schedule["pareto_front"][selected]["presentations"]) if selected is not None else ""
+        ),
+        "recommendations": json.dumps(
+            [r.get("item") for r in recs["recommended_next_steps"]], ensure_ascii=False
+        ),
+    }
+
+
+def _write_chunk(rows, out_dir, chunk_idx, fmt):
+    df = pd.DataFrame(rows)
+    path = os.path.join(out_dir, f"part-{chunk_idx:05d}.{fmt}")
+    tmp_path = path + ".tmp"
+    if fmt == "parquet":
+        df.to_parquet(tmp_path, index=False)
+    else:
+        df.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+    return path
+
+
+def _process_chunk(task):
+    chunk_idx, student_ids, out_dir, fmt = task
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        rows = [score_student(_agents, sid) for sid in student_ids]
+    _write_chunk(rows, out_dir, chunk_idx, fmt)
+    return chunk_idx, len(rows), time.perf_counter() - t0
+
+
+# --------------------------------------------------
+# Checkpoint / partitionnement
+# --------------------------------------------------
+def _chunk_path(out_dir, chunk_idx, fmt):
+    return os.path.join(out_dir, f"part-{chunk_idx:05d}.{fmt}")
+
+
+def _load_checkpoint(out_dir, ids_digest, chunk_size, fmt):
+    """ Vérifie que la sortie existante correspond au même partitionnement """
+    path = os.path.join(out_dir, CHECKPOINT)
+    expected = {"ids_sha1": ids_digest, "chunk_size": chunk_size, "format": fmt}
+    if os.path.exists(path):
+        with open(path) as f:
+            found = json.load(f)
+        if {k: found.get(k) for k in expected} != expected:
+            raise ValueError(
+                f"{out_dir} contient un run incompatible ({found}) : utiliser un autre --out"
+            )
+    else:
+        with open(path, "w") as f:
+            json.dump(expected, f, indent=2)
+
+
+def run(data_path, out_dir, workers=None, chunk_size=500, shared_dir=None, fmt=None, limit=None):
+    global _agents
+    if fmt is None:
+        try:
+            import pyarrow  # noqa: F401
+            fmt = "parquet"
+        except ImportError:
+            fmt = "csv"
+
+    t_start = time.perf_counter()
+    if shared_dir:
+        data, precomputed = attach(shared_dir)
+    else:
+        data = OULADDataLoader(data_path).load_all()
+        precomputed = None
+    _agents = _build_agents(data, precomputed)
+    print(f"→ Agents prêts en {time.perf_counter() - t_start:.1f}s")
+
+    student_ids = np.sort(data["student_info"]["id_student"].unique())
+    if limit:
+        student_ids = student_ids[:limit]
+    ids_digest = hashlib.sha1(np.ascontiguousarray(student_ids, dtype=np.int64).tobytes()).hexdigest()
+
+    os.makedirs(out_dir, exist_ok=True)
+    _load_checkpoint(out_dir, ids_digest, chunk_size, fmt)
+
+    chunks = [
+        (i, student_ids[start:start + chunk_size].tolist(), out_dir, fmt)
+        for i, start in enumerate(range(0, len(student_ids), chunk_size))
+    ]
+    todo = [c for c in chunks if not os.path.exists(_chunk_path(out_dir, c[0], fmt))]
+    print(f"→ {len(student_ids)} étudiants, {len(chunks)} chunks ({len(chunks) - len(todo)} déjà faits)")
+
+    # fork : les workers héritent des agents (copy-on-write) ;
+    # sinon (Windows/macOS spawn) : publication temporaire en mmap puis attachement
+    tmp_shared = None
+    if "fork" in mp.get_all_start_methods():
+        ctx = mp.get_context("fork")
+    else:
+        ctx = mp.get_context()
+        if not shared_dir:
+            tmp_shared = tempfile.mkdtemp(prefix="oulad_shared_")
+            shared_dir = publish(data, _agents["profiling"], os.path.join(tmp_shared, "oulad"))
+
+    done_students = 0
+    t_run = time.perf_counter()
+    try:
+        with ctx.Pool(processes=workers, initializer=_init_worker, initargs=(shared_dir,)) as pool:
+            for chunk_idx, n_rows, seconds in pool.imap_unordered(_process_chunk, todo):
+                done_students += n_rows
+                elapsed = time.perf_counter() - t_run
+                print(f"  chunk {chunk_idx:05d} : {n_rows} étudiants en {seconds:.1f}s "
+                      f"— cumul {done_students / elapsed:.1f} étudiants/s")
+    finally:
+        if tmp_shared:
+            shutil.rmtree(tmp_shared, ignore_errors=True)
+
+    elapsed = time.perf_counter() - t_run
+    throughput = done_students / elapsed if elapsed > 0 else 0.0
+    print(f"✅ {done_students} étudiants traités en {elapsed:.1f}s ({throughput:.1f} étudiants/s) → {out_dir}")
+    return {"students": done_students, "seconds": elapsed, "students_per_second": throughput}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scoring batch de toute la cohorte OULAD")
+    parser.add_argument("--data", default="../data/oulad/", help="dossier des CSV OULAD")
+    parser.add_argument("--shared-dir", help="dataset publié par shared_dataset.py (mmap)")
+    parser.add_argument("--out", required=True, help="dossier de sortie (chunks + checkpoint)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--format", choices=["parquet", "csv"], default=None)
+    parser.add_argument("--limit", type=int, default=None, help="ne traiter que les N premiers étudiants")
+    args = parser.parse_args(argv)
+
+    run(args.data, args.out, workers=args.workers, chunk_size=args.chunk_size,
+        shared_dir=args.shared_dir, fmt=args.format, limit=args.limit)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,10 +3,18 @@ import re
 import os
 import subprocess
 import json
+import shutil
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import faiss
 from langchain_classic.vectorstores import FAISS
 from langchain_classic.embeddings import HuggingFaceEmbeddings
+from langchain_classic.embeddings.base import Embeddings
+from langchain_classic.docstore import InMemoryDocstore
 from langchain_classic.prompts import PromptTemplate
 from langchain_classic.schema import Document
+from utils import metrics
 
 class OllamaLocal:
     def __init__(self, model_name="gemma3:1b"):
@@ -16,17 +24,20 @@ class OllamaLocal:
     def generate(self, prompts: list[str]):
         generations = []
         for prompt in prompts:
+            metrics.inc("llm_prompt_tokens", len(prompt.split()))
             try:
-                result = subprocess.run(
-                    [self.ollama_path, "run", self.model],
-                    input=prompt.encode(),
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    check=True
-                )
+                with metrics.span("llm.ollama_subprocess"):
+                    result = subprocess.run(
+                        [self.ollama_path, "run", self.model],
+                        input=prompt.encode(),
+                        stdout=subprocess.PIPE,
+                        stderr=subprocess.PIPE,
+                        check=True
+                    )
                 text_output = result.stdout.decode().strip()
             except subprocess.CalledProcessError as e:
                 text_output = f"Error: {e.stderr.decode().strip()}"
+            metrics.inc("llm_completion_tokens", len(text_output.split()))
             generations.append([SimpleGeneration(text_output)])
         return SimpleResponse(generations)
     
@@ -38,20 +49,195 @@ class SimpleResponse:
     def __init__(self, generations):
         self.generations = generations
 
+# --- Backends d'embeddings CPU ---
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+# Export ONNX quantifié int8 publié avec le modèle sur le Hub
+ONNX_INT8_FILE = "onnx/model_quint8_avx2.onnx"
+
+
+class SentenceTransformerEmbeddings(Embeddings):
+    """
+    sentence-transformers avec backend "torch" ou "onnx" (onnxruntime) ;
+    quantize=True → int8 (quantification dynamique torch ou export ONNX int8)
+    """
+    def __init__(self, model_name=EMBEDDING_MODEL, backend="torch", quantize=False):
+        from sentence_transformers import SentenceTransformer
+
+        kwargs = {}
+        if backend == "onnx":
+            kwargs["backend"] = "onnx"
+            if quantize:
+                kwargs["model_kwargs"] = {"file_name": ONNX_INT8_FILE}
+        self.model = SentenceTransformer(model_name, device="cpu", **kwargs)
+
+        if backend == "torch" and quantize:
+            import torch
+            self.model = torch.quantization.quantize_dynamic(self.model, {torch.nn.Linear}, dtype=torch.qint8)
+
+    def embed_documents(self, texts):
+        vectors = self.model.encode(list(texts), convert_to_numpy=True)
+        return vectors.astype("float32").tolist()
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+EMBEDDING_BACKENDS = {
+    "torch": lambda: HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL),
+    "torch-int8": lambda: SentenceTransformerEmbeddings(backend="torch", quantize=True),
+    "onnx": lambda: SentenceTransformerEmbeddings(backend="onnx"),
+    "onnx-int8": lambda: SentenceTransformerEmbeddings(backend="onnx", quantize=True),
+}
+
+
+def make_embeddings(backend=None):
+    """ Backend choisi par argument ou RAG_EMBEDDING_BACKEND (défaut : torch, comportement historique) """
+    backend = backend or os.environ.get("RAG_EMBEDDING_BACKEND", "torch")
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Backend d'embeddings inconnu : {backend} (choix : {', '.join(EMBEDDING_BACKENDS)})")
+    return EMBEDDING_BACKENDS[backend]()
+
+
+# --- Index FAISS shardé par module ---
+class ShardedVectorStore:
+    """
+    Un index FAISS par code_module (metadata "module") dans index_path/<module>/.
+    Les shards sont chargés à la demande et gardés dans un cache LRU borné par
+    memory_budget_mb (taille sur disque des shards comme estimation mémoire).
+    La recherche n'interroge que les shards demandés, en parallèle, puis
+    fusionne les top-k par distance.
+    """
+    MANIFEST = "shards.json"
+
+    def __init__(self, index_path, embeddings, memory_budget_mb=256, max_workers=4):
+        self.index_path = index_path
+        self.embeddings = embeddings
+        self.memory_budget = memory_budget_mb * 1024 * 1024
+        self.max_workers = max_workers
+        self._shards = OrderedDict()  # module → FAISS (ordre LRU)
+        self._loaded_bytes = 0
+        self._lock = threading.Lock()
+
+        with open(os.path.join(index_path, self.MANIFEST)) as f:
+            self.manifest = json.load(f)  # module → {"documents", "bytes"}
+
+    @classmethod
+    def build(cls, index_path, docs, embeddings, new_vectorstore, **kwargs):
+        """ Regroupe docs par module et écrit un shard par module + le manifeste """
+        by_module = {}
+        for doc in docs:
+            by_module.setdefault(doc.metadata.get("module", "?"), []).append(doc)
+
+        manifest = {}
+        for module, module_docs in sorted(by_module.items()):
+            texts = [doc.page_content for doc in module_docs]
+            vectors = embeddings.embed_documents(texts)
+            store = new_vectorstore(len(vectors[0]))
+            store.add_embeddings(list(zip(texts, vectors)), metadatas=[doc.metadata for doc in module_docs])
+            shard_path = os.path.join(index_path, module)
+            store.save_local(shard_path)
+            manifest[module] = {
+                "documents": len(module_docs),
+                "bytes": sum(os.path.getsize(os.path.join(shard_path, f)) for f in os.listdir(shard_path)),
+            }
+
+        with open(os.path.join(index_path, cls.MANIFEST), "w") as f:
+            json.dump(manifest, f, indent=2)
+        return cls(index_path, embeddings, **kwargs)
+
+    @property
+    def modules(self):
+        return list(self.manifest)
+
+    def _get_shard(self, module):
+        with self._lock:
+            shard = self._shards.get(module)
+            if shard is not None:
+                self._shards.move_to_end(module)
+                metrics.inc("rag_shard_cache_hits")
+                return shard
+
+        with metrics.span("rag.load_shard"):
+            shard = FAISS.load_local(os.path.join(self.index_path, module), self.embeddings,
+                                     allow_dangerous_deserialization=True)
+        metrics.inc("rag_shard_loads")
+
+        with self._lock:
+            if module not in self._shards:
+                self._shards[module] = shard
+                self._loaded_bytes += self.manifest[module]["bytes"]
+            self._shards.move_to_end(module)
+            # Éviction LRU au-delà du budget (le shard courant est conservé)
+            while self._loaded_bytes > self.memory_budget and len(self._shards) > 1:
+                evicted, _ = self._shards.popitem(last=False)
+                self._loaded_bytes -= self.manifest[evicted]["bytes"]
+                metrics.inc("rag_shard_evictions")
+            return self._shards.get(module, shard)
+
+    def search(self, query, modules=None, k=3):
+        """ Top-k global sur les shards `modules` (tous si None ou aucun connu) """
+        targets = [m for m in (modules or []) if m in self.manifest] or self.modules
+        query_vector = self.embeddings.embed_query(query)
+
+        def search_shard(module):
+            return self._get_shard(module).similarity_search_with_score_by_vector(query_vector, k=k)
+
+        if len(targets) == 1:
+            results = search_shard(targets[0])
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(targets))) as pool:
+                results = [hit for hits in pool.map(search_shard, targets) for hit in hits]
+
+        results.sort(key=lambda hit: hit[1])  # distance L2 croissante
+        return [doc for doc, _ in results[:k]]
+
+
 # --- Générateur de contenu RAG ---
 class ContentGeneratorRAG:
-    def __init__(self, model_name="gemma3:1b", index_path="faiss_index"):
+    def __init__(self, model_name="gemma3:1b", index_path="faiss_index",
+                 embedding_backend=None, vector_dtype="float16", shard_memory_budget_mb=None):
+        """
+        embedding_backend : voir EMBEDDING_BACKENDS (défaut RAG_EMBEDDING_BACKEND ou "torch")
+        vector_dtype : "float16" (IndexScalarQuantizer fp16, mémoire /2) ou "float32" (IndexFlatL2)
+        shard_memory_budget_mb : budget des shards chargés (défaut RAG_SHARD_BUDGET_MB ou 256)
+        """
         self.model_name = model_name
         self.index_path = index_path
+        self.embedding_backend = embedding_backend or os.environ.get("RAG_EMBEDDING_BACKEND", "torch")
+        self.vector_dtype = vector_dtype
+        self.shard_memory_budget_mb = shard_memory_budget_mb or int(os.environ.get("RAG_SHARD_BUDGET_MB", "256"))
         self.llm = OllamaLocal(model_name=model_name)
-        self.embeddings = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
+        with metrics.span("rag.load_embeddings"):
+            self.embeddings = make_embeddings(self.embedding_backend)
 
-        if os.path.exists(index_path):
-            self.vectorstore = FAISS.load_local(index_path, self.embeddings, allow_dangerous_deserialization=True)
+        # Un index construit avec un autre backend/format est reconstruit
+        if os.path.exists(index_path) and self._index_meta() == self._expected_meta():
+            metrics.inc("rag_index_cache_hits")
+            self.vectorstore = ShardedVectorStore(index_path, self.embeddings,
+                                                  memory_budget_mb=self.shard_memory_budget_mb)
         else:
             docs = self._get_sample_documents()
             self.build_index(docs)
 
+    def _expected_meta(self):
+        return {"embedding_backend": self.embedding_backend, "vector_dtype": self.vector_dtype,
+                "layout": "sharded"}
+
+    def _index_meta(self):
+        meta_path = os.path.join(self.index_path, "index_meta.json")
+        if not os.path.exists(meta_path):
+            # Index antérieur : global, construit avec HuggingFaceEmbeddings en float32
+            return {"embedding_backend": "torch", "vector_dtype": "float32", "layout": "global"}
+        with open(meta_path) as f:
+            return json.load(f)
+
+    def _new_vectorstore(self, dim):
+        if self.vector_dtype == "float16":
+            index = faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_fp16, faiss.METRIC_L2)
+        else:
+            index = faiss.IndexFlatL2(dim)
+        return FAISS(self.embeddings, index, InMemoryDocstore(), {})
+
     def _get_sample_documents(self):
         return [
             Document(page_content="Computer science studies computation, algorithms, data structures, software, and AI.", metadata={"module": "CCC"}),
@@ -62,19 +248,30 @@ class ContentGeneratorRAG:
         ]
 
     def build_index(self, docs):
-        self.vectorstore = FAISS.from_documents(docs, self.embeddings)
-        self.vectorstore.save_local(self.index_path)
+        shutil.rmtree(self.index_path, ignore_errors=True)
+        os.makedirs(self.index_path)
+        with metrics.span("rag.build_index"):
+            self.vectorstore = ShardedVectorStore.build(
+                self.index_path, docs, self.embeddings, self._new_vectorstore,
+                memory_budget_mb=self.shard_memory_budget_mb
+            )
+        with open(os.path.join(self.index_path, "index_meta.json"), "w") as f:
+            json.dump(self._expected_meta(), f)
         print(f"✅ Index FAISS créé : {self.index_path}")
 
+    @metrics.timed("rag.generate_learning_content")
     def generate_learning_content(self, profile, planned_path, top_k=3):
         if not self.vectorstore:
             raise ValueError("Index FAISS non disponible")
 
-        retriever = self.vectorstore.as_retriever(search_kwargs={"k": top_k})
-        context_docs = retriever._get_relevant_documents(
-            f"Planned path modules: {', '.join(planned_path)}. Student profile: {profile}",
-            run_manager=None
-        )
+        # Modules du parcours : "CCC", "CCC_ass_123", "CCC_2014J" → "CCC"
+        modules = list(dict.fromkeys(str(item).split("_")[0] for item in planned_path))
+        with metrics.span("rag.retrieval"):
+            context_docs = self.vectorstore.search(
+                f"Planned path modules: {', '.join(planned_path)}. Student profile: {profile}",
+                modules=modules,
+                k=top_k
+            )
         context_text = "\n".join([doc.page_content for doc in context_docs])
 
         # Prompt template avec JSON échappé
@@ -121,7 +318,8 @@ Output in JSON format only:
         )
 
         # Génération
-        response = self.llm.generate([prompt_text])
+        with metrics.span("rag.llm_generate"):
+            response = self.llm.generate([prompt_text])
         response_text = response.generations[0][0].text
 
         # Essayer de parser JSON pour quizzes
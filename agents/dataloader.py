@@ -1,6 +1,7 @@
 import pandas as pd
 import os
 import numpy as np
+from utils import metrics
 
 class OULADDataLoader:
     def __init__(self, data_path="../data/oulad/"):
@@ -11,14 +12,17 @@ class OULADDataLoader:
         self.assessments = None
         self.courses = None
 
+    @metrics.timed("dataloader.load_all")
     def load_all(self):
         """Charge tous les fichiers OULAD et nettoie les NaN"""
         # Chargement des fichiers
-        self.student_info = pd.read_csv(os.path.join(self.data_path, "studentInfo.csv"))
-        self.student_assessment = pd.read_csv(os.path.join(self.data_path, "studentAssessment.csv"))
-        self.student_vle = pd.read_csv(os.path.join(self.data_path, "studentVle.csv"))
-        self.assessments = pd.read_csv(os.path.join(self.data_path, "assessments.csv"))
-        self.courses = pd.read_csv(os.path.join(self.data_path, "courses.csv"))
+        with metrics.span("dataloader.read_csv"):
+            self.student_info = pd.read_csv(os.path.join(self.data_path, "studentInfo.csv"))
+            self.student_assessment = pd.read_csv(os.path.join(self.data_path, "studentAssessment.csv"))
+            self.student_vle = pd.read_csv(os.path.join(self.data_path, "studentVle.csv"))
+            self.assessments = pd.read_csv(os.path.join(self.data_path, "assessments.csv"))
+            self.courses = pd.read_csv(os.path.join(self.data_path, "courses.csv"))
+        metrics.inc("dataloader_rows_loaded", len(self.student_assessment) + len(self.student_vle))
 
         # ─── Nettoyage des NaN ───
         # Scores
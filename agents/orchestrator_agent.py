@@ -1,24 +1,53 @@
-from flask import Flask, render_template, request
+import os
+from flask import Flask, Response, g, render_template, request
 from dataloader import OULADDataLoader
 from profiling_agent import ProfilingAgent
 from path_planning_agent import PathPlanningAgent
 from content_generator_rag import ContentGeneratorRAG
 from recommendation_agent import RecommendationAgent
 from xai_agent import XAIAgent
+from shared_dataset import attach
+from utils import metrics
 app = Flask(__name__)
 
 # ─── Chargement des données et initialisation des agents ───
-loader = OULADDataLoader()
-data = loader.load_all()
-profiling_agent = ProfilingAgent(data)
+# OULAD_SHARED_DIR : s'attacher au dataset publié par shared_dataset.py (multi-workers)
+shared_dir = os.environ.get("OULAD_SHARED_DIR")
+if shared_dir:
+    data, precomputed = attach(shared_dir)
+else:
+    loader = OULADDataLoader()
+    data = loader.load_all()
+    precomputed = None
+profiling_agent = ProfilingAgent(data, precomputed=precomputed)
 path_planning_agent = PathPlanningAgent(data)
 rec_agent = RecommendationAgent(data)
+xai_agent = XAIAgent(profiling_agent)
 
 # ─── Content Generator  ───
 content_llm = ContentGeneratorRAG()  #
 
+# ─── Instrumentation (AGENTS_METRICS=1, AGENTS_PROFILE_DIR=...) ───
+@app.before_request
+def _start_request_metrics():
+    g.metrics_token = metrics.start_request()
+    g.sampler = metrics.maybe_start_sampler()
+
+@app.after_request
+def _finish_request_metrics(response):
+    spans = metrics.end_request(g.pop("metrics_token", None))
+    metrics.finish_sampler(g.pop("sampler", None), label=request.endpoint or "request")
+    if spans:
+        response.headers["Server-Timing"] = metrics.server_timing_header(spans)
+    return response
+
+@app.route("/metrics")
+def metrics_endpoint():
+    return Response(metrics.render_prometheus(), mimetype="text/plain; version=0.0.4")
+
 # ─── Route principale ───
 @app.route("/", methods=["GET", "POST"])
+@metrics.timed("orchestrator.interface")
 def interface():
     student_type = None
     profiling_result = None
@@ -64,7 +93,6 @@ def interface():
             rec_results = rec_agent.recommend(profiling_result, planning_result["planned_path"], generated_content=content_results)
         # Appel au XAI Agent
         if rec_results:
-            xai_agent = XAIAgent(profiling_agent)
             xai_results = xai_agent.explain(profiling_result, planning_result["planned_path"], rec_results)
     modules = sorted(data["courses"]["code_module"].unique())
 
@@ -1,6 +1,7 @@
 # path_planning_agent.py
 # Path Planning Agent – Planifie le parcours pédagogique personnalisé
 # Technologies : Graph search (A*) + heuristiques personnalisées
+#                + graphe temporel (module, présentation, date) et front de Pareto
 # Entrée : dict profil depuis Profiling Agent
 # Sortie : liste de modules + assessments recommandés (chemin optimal basé sur données OULAD)
 
@@ -8,6 +9,7 @@ import networkx as nx
 import pandas as pd
 from heapq import heappush, heappop
 from utils.visualize_graph import save_graph_image, save_path_image
+from utils import metrics
 
 class PathPlanningAgent:
     def __init__(self, data):
@@ -20,6 +22,11 @@ class PathPlanningAgent:
         self.student_assessment = data["student_assessment"]
         self.student_vle = data["student_vle"]
 
+        # Graphe temporel compilé (catalogue statique → construit une seule fois)
+        self._schedule = None
+        self._build_schedule_graph()
+
+    @metrics.timed("path_planning.build_graph")
     def _build_graph(self, start_module=None):
         """ Construit le graphe pédagogique pour un profil donné """
         G = nx.DiGraph()
@@ -108,6 +115,7 @@ class PathPlanningAgent:
 
         return base
 
+    @metrics.timed("path_planning.a_star_search")
     def _a_star_search(self, start, goal, profile, graph):
         """ Recherche A* personnalisée """
         open_set = []
@@ -118,6 +126,7 @@ class PathPlanningAgent:
 
         while open_set:
             _, current = heappop(open_set)
+            metrics.inc("path_planning_nodes_expanded")
 
             if current == goal:
                 path = []
@@ -138,8 +147,220 @@ class PathPlanningAgent:
 
         return []  # Pas de chemin trouvé
 
-    def plan_path(self, profile):
-        """ Planifie le parcours pédagogique pour un profil donné """
+    # --------------------------------------------------
+    # Graphe temporel (module, présentation, date d'assessment)
+    # --------------------------------------------------
+    @staticmethod
+    def _presentation_start(code_presentation):
+        """ Jour absolu de début d'une présentation : "2013B" → février 2013, "2014J" → octobre 2014 """
+        code = str(code_presentation)
+        year = int(code[:4])
+        return (year - 2013) * 365 + (31 if code[4:] == "B" else 273)
+
+    @metrics.timed("path_planning.build_schedule_graph")
+    def _build_schedule_graph(self):
+        """
+        Graphe temporel : un nœud module par présentation puis ses assessments
+        dans l'ordre des dates ; une présentation mène à toute présentation d'un
+        autre module qui commence après sa fin.
+
+        Les chaînes module → assessments d'une présentation étant forcées, la
+        recherche travaille sur une version compilée (une entrée par présentation,
+        coûts agrégés) ; le graphe networkx sert à l'affichage.
+        """
+        G = nx.DiGraph()
+        assessments = self.assessments.copy()
+        assessments["date"] = pd.to_numeric(assessments["date"], errors="coerce")
+        assessments["weight"] = pd.to_numeric(assessments["weight"], errors="coerce").fillna(0.0)
+        ass_by_pres = {
+            key: grp for key, grp in assessments.groupby(["code_module", "code_presentation"], observed=True)
+        }
+
+        presentations = []
+        for row in self.courses.itertuples(index=False):
+            module, presentation = str(row.code_module), str(row.code_presentation)
+            length = row.module_presentation_length
+            length = float(length) if pd.notna(length) else 200.0
+            start = self._presentation_start(presentation)
+            module_diff = min(5.0, max(1.0, length / 50.0))
+
+            module_node = f"{module}_{presentation}"
+            G.add_node(module_node, type="module", difficulty=module_diff, code_module=module,
+                       code_presentation=presentation, time=start)
+            nodes = [module_node]
+            difficulty, weight = module_diff, 0.0
+
+            ass = ass_by_pres.get((module, presentation))
+            if ass is not None:
+                ass = ass.assign(date=ass["date"].fillna(length)).sort_values(["date", "id_assessment"])
+                for a in ass.itertuples(index=False):
+                    diff = 2.0 if a.assessment_type == "CMA" else 4.0 if a.assessment_type in ["TMA", "Exam"] else 3.5
+                    node = f"{module}_{presentation}_ass_{a.id_assessment}"
+                    G.add_node(node, type="assessment", difficulty=diff, code_module=module,
+                               code_presentation=presentation, time=start + a.date, weight=float(a.weight))
+                    G.add_edge(nodes[-1], node, weight=diff * 0.6)
+                    nodes.append(node)
+                    difficulty += diff
+                    weight += float(a.weight)
+
+            presentations.append({
+                "module": module, "presentation": presentation, "nodes": nodes,
+                "start": start, "end": start + length,
+                "difficulty": difficulty, "weight": weight,
+            })
+
+        presentations.sort(key=lambda p: (p["start"], p["module"]))
+        modules = sorted({p["module"] for p in presentations})
+        module_bit = {m: 1 << i for i, m in enumerate(modules)}
+
+        # Successeurs : présentation d'un autre module commençant après la fin
+        successors = []
+        for i, p in enumerate(presentations):
+            succ = [
+                j for j, q in enumerate(presentations)
+                if q["module"] != p["module"] and q["start"] >= p["end"]
+            ]
+            successors.append(succ)
+            for j in succ:
+                G.add_edge(p["nodes"][-1], presentations[j]["nodes"][0], weight=2.0)
+
+        self._schedule = {
+            "graph": G,
+            "presentations": presentations,
+            "successors": successors,
+            "module_bit": module_bit,
+            # Coûts compacts : (difficulté, poids, durée) par présentation
+            "costs": [(p["difficulty"], p["weight"], p["end"] - p["start"]) for p in presentations],
+            "min_costs": (
+                min(p["difficulty"] for p in presentations),
+                min(p["weight"] for p in presentations),
+                min(p["end"] - p["start"] for p in presentations),
+            ) if presentations else (0.0, 0.0, 0.0),
+        }
+        print(f"Graphe temporel construit : {G.number_of_nodes()} nœuds, {G.number_of_edges()} arêtes")
+        return self._schedule
+
+    @metrics.timed("path_planning.pareto_search")
+    def _pareto_search(self, n_modules=3, start_module=None):
+        """
+        Label-setting multi-objectif (Martins) : minimise (difficulté, poids total,
+        durée en jours) pour un enchaînement de n_modules présentations de modules
+        distincts. Labels compacts (tuples), dominance par (présentation, modules
+        visités), élagage par borne inférieure contre le front courant.
+        Retourne le front de Pareto trié par difficulté.
+        """
+        schedule = self._schedule or self._build_schedule_graph()
+        presentations = schedule["presentations"]
+        successors = schedule["successors"]
+        costs = schedule["costs"]
+        module_bit = schedule["module_bit"]
+        min_d, min_w, min_t = schedule["min_costs"]
+
+        # label = (difficulté, poids, durée, présentation, masque modules, nb modules, début, n°, parent)
+        heap = []
+        seq = 0
+        for i, p in enumerate(presentations):
+            if start_module and p["module"] != start_module:
+                continue
+            d, w, t = costs[i]
+            heappush(heap, (d, w, t, i, module_bit[p["module"]], 1, p["start"], seq, None))
+            seq += 1
+
+        buckets = {}
+        front = []
+        solutions = []
+
+        def dominated(d, w, t, labels):
+            for ld, lw, lt in labels:
+                if ld <= d and lw <= w and lt <= t:
+                    return True
+            return False
+
+        while heap:
+            label = heappop(heap)
+            d, w, t, i, mask, count, start, _, parent = label
+            metrics.inc("path_planning_labels_popped")
+
+            key = (i, mask)
+            bucket = buckets.setdefault(key, [])
+            if dominated(d, w, t, bucket):
+                continue
+            bucket.append((d, w, t))
+
+            if count == n_modules:
+                # Ordre lexicographique : un label dépilé n'est jamais dominé par un label ultérieur
+                if not dominated(d, w, t, front):
+                    front.append((d, w, t))
+                    solutions.append(label)
+                continue
+
+            remaining = n_modules - count - 1
+            for j in successors[i]:
+                bit = module_bit[presentations[j]["module"]]
+                if mask & bit:
+                    continue
+                dj, wj, tj = costs[j]
+                nd, nw = d + dj, w + wj
+                nt = presentations[j]["end"] - start
+                if dominated(nd + remaining * min_d, nw + remaining * min_w, nt + remaining * min_t, front):
+                    continue
+                if dominated(nd, nw, nt, buckets.get((j, mask | bit), ())):
+                    continue
+                seq += 1
+                heappush(heap, (nd, nw, nt, j, mask | bit, count + 1, start, seq, label))
+
+        results = []
+        for label in solutions:
+            sequence = []
+            node = label
+            while node is not None:
+                sequence.append(node[3])
+                node = node[-1]
+            sequence.reverse()
+            results.append({
+                "presentations": [
+                    f"{presentations[i]['module']}_{presentations[i]['presentation']}" for i in sequence
+                ],
+                "path": [n for i in sequence for n in presentations[i]["nodes"]],
+                "difficulty": round(label[0], 1),
+                "total_weight": round(label[1], 1),
+                "duration_days": int(label[2]),
+            })
+        return results
+
+    def _select_pareto(self, front, profile):
+        """ Choisit une option du front selon le profil (objectifs normalisés, pondérés par le risque) """
+        risk = profile.get("risk_level", "medium")
+        weights = {"high": (0.6, 0.2, 0.2), "low": (0.2, 0.3, 0.5)}.get(risk, (1 / 3, 1 / 3, 1 / 3))
+        keys = ["difficulty", "total_weight", "duration_days"]
+        lows = [min(opt[k] for opt in front) for k in keys]
+        highs = [max(opt[k] for opt in front) for k in keys]
+
+        def score(opt):
+            return sum(
+                w * ((opt[k] - lo) / (hi - lo) if hi > lo else 0.0)
+                for w, k, lo, hi in zip(weights, keys, lows, highs)
+            )
+        return min(range(len(front)), key=lambda i: score(front[i]))
+
+    def plan_schedule(self, profile, start_module=None, n_modules=3):
+        """ Front de Pareto des enchaînements de présentations (réduit n_modules si infaisable) """
+        for n in range(n_modules, 0, -1):
+            front = self._pareto_search(n_modules=n, start_module=start_module)
+            if front:
+                selected = self._select_pareto(front, profile)
+                return {
+                    "n_modules": n,
+                    "pareto_front": front,
+                    "selected_index": selected,
+                    "selected_path": front[selected]["path"],
+                    "objectives": ["difficulty", "total_weight", "duration_days"]
+                }
+        return {"n_modules": 0, "pareto_front": [], "selected_index": None, "selected_path": []}
+
+    @metrics.timed("path_planning.plan_path")
+    def plan_path(self, profile, save_image=True):
+        """ Planifie le parcours pédagogique pour un profil donné (save_image=False en batch) """
         start_module = None
         student_id = profile.get("student_id")
 
@@ -178,13 +399,17 @@ class PathPlanningAgent:
         path = self._a_star_search("Start", "End", profile, graph)
         clean_path = [n for n in path if n not in ["Start", "End"]]
 
+        # Planification sur le calendrier réel (présentations, dates, poids)
+        schedule = self.plan_schedule(profile, start_module=start_module)
+
         notes = "Chemin planifié via A* avec données OULAD réelles (ordre chronologique + assessments)"
         if len(clean_path) < 3:
             notes += " (chemin court : historique étudiant limité ou peu d'assessments)"
 
-        if clean_path:
-            save_path_image(graph, clean_path)
-        else:
+        if save_image and clean_path:
+            with metrics.span("path_planning.save_path_image"):
+                save_path_image(graph, clean_path)
+        elif save_image:
             print("Pas de chemin valide → pas d'image générée")
 
         return {
@@ -193,5 +418,6 @@ class PathPlanningAgent:
             "start_module_used": start_module if start_module else "fallback",
             "adapted_to_style": profile.get("learning_style"),
             "adapted_to_risk": profile.get("risk_level"),
+            "schedule": schedule,
             "notes": notes
         }
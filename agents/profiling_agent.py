@@ -7,17 +7,20 @@ import numpy as np
 import pandas as pd
 from sklearn.preprocessing import StandardScaler
 from sklearn.cluster import KMeans
+from utils import metrics
 
 
 class ProfilingAgent:
 
-    def __init__(self, data, n_clusters=3):
+    def __init__(self, data, n_clusters=3, precomputed=None):
         """
         data = {
             "student_info": DataFrame,
             "student_assessment": DataFrame,
             "student_vle": DataFrame
         }
+        precomputed = sortie de export_precomputed() (ex. segment partagé
+        publié par shared_dataset.py) → pas de ré-entraînement
         """
         self.student_info = data["student_info"]
         self.student_assessment = data["student_assessment"]
@@ -31,10 +34,25 @@ class ProfilingAgent:
             "practice": 2
         }
 
+        self.feature_names = [
+            "mean_score", "score_std", "total_clicks",
+            "clicks_per_day", "learning_style", "completed_modules"
+        ]
+
         self.scaler = StandardScaler()
         self.kmeans = None
 
-        self._fit_clusters()
+        # Tables précalculées après _fit_clusters (utilisées par XAIAgent)
+        # features / feature_ids / labels sont triés par id_student
+        self.features = None
+        self.feature_ids = None
+        self.labels = None
+        self.cluster_stats = None
+
+        if precomputed is not None:
+            self._load_precomputed(precomputed)
+        else:
+            self._fit_clusters()
 
 
     # --------------------------------------------------
@@ -88,29 +106,148 @@ class ProfilingAgent:
     # --------------------------------------------------
     # Entraînement KMeans
     # --------------------------------------------------
+    @metrics.timed("profiling.fit_clusters")
     def _fit_clusters(self):
         print("→ Entraînement du Profiling Agent...")
 
         student_ids = self.student_info["id_student"].unique()  # ajustable
 
         embeddings = []
+        ids = []
         for sid in student_ids:
             emb = self._create_embedding_existing(sid)
             if emb is not None:
                 embeddings.append(emb)
+                ids.append(int(sid))
 
-        X = np.array(embeddings)
-        X_scaled = self.scaler.fit_transform(X)
+        ids = np.array(ids, dtype=np.int64)
+        order = np.argsort(ids, kind="stable")
+        ids = ids[order]
+        X = np.array(embeddings, dtype=float)[order]
+        metrics.inc("profiling_embeddings_computed", len(ids))
 
-        self.kmeans = KMeans(n_clusters=self.n_clusters, random_state=42, n_init=10)
-        self.kmeans.fit(X_scaled)
+        with metrics.span("profiling.kmeans_fit"):
+            X_scaled = self.scaler.fit_transform(X)
+            self.kmeans = KMeans(n_clusters=self.n_clusters, random_state=42, n_init=10)
+            self.kmeans.fit(X_scaled)
+
+        self.features = X
+        self.feature_ids = ids
+        self.labels = self.kmeans.labels_.astype(np.int32)
+        self.cluster_stats = self._compute_cluster_stats(X, self.labels)
 
         print(f"→ Clustering terminé ({self.n_clusters} clusters)")
 
+    # --------------------------------------------------
+    # Export / chargement des tables précalculées
+    # --------------------------------------------------
+    def export_precomputed(self):
+        """ Tableaux par étudiant + modèles (petits) réutilisables sans ré-entraînement """
+        return {
+            "features": self.features,
+            "feature_ids": self.feature_ids,
+            "labels": self.labels,
+            "scaler": self.scaler,
+            "kmeans": self.kmeans,
+            "cluster_stats": self.cluster_stats,
+        }
+
+    def _load_precomputed(self, precomputed):
+        self.features = precomputed["features"]
+        self.feature_ids = precomputed["feature_ids"]
+        self.labels = precomputed["labels"]
+        self.scaler = precomputed["scaler"]
+        self.kmeans = precomputed["kmeans"]
+        self.cluster_stats = precomputed["cluster_stats"]
+        print(f"→ Profiling Agent chargé depuis les tables précalculées ({len(self.feature_ids)} étudiants)")
+
+    def _feature_row(self, student_id):
+        """ Index de l'étudiant dans self.features (recherche dichotomique), None si absent """
+        try:
+            student_id = int(student_id)
+        except (TypeError, ValueError):
+            return None
+        row = int(np.searchsorted(self.feature_ids, student_id))
+        if row < len(self.feature_ids) and self.feature_ids[row] == student_id:
+            return row
+        return None
+
+    # --------------------------------------------------
+    # Statistiques par cluster (calculées une seule fois)
+    # --------------------------------------------------
+    def _compute_cluster_stats(self, X, labels):
+        """
+        Tables par cluster pour les explications :
+        - centroids        : centroïdes en unités d'origine (k, d)
+        - centroids_scaled : centroïdes dans l'espace standardisé (k, d)
+        - means / stds     : moyenne et écart-type des features (k, d)
+        - quantiles        : quantiles 25/50/75 % des features (k, 3, d)
+        - sizes            : nombre d'étudiants par cluster (k,)
+        - feature_min/max  : bornes observées sur toute la population (d,)
+        - boundary_normals : frontières entre centroïdes, w[i, j] = 2 (c_j - c_i) (k, k, d)
+        - boundary_offsets : b[i, j] = |c_i|² - |c_j|² (k, k)
+          → un point z (standardisé) passe de i à j quand z·w[i, j] + b[i, j] > 0
+        """
+        k = self.n_clusters
+        centroids_scaled = self.kmeans.cluster_centers_
+        centroids = self.scaler.inverse_transform(centroids_scaled)
+
+        d = X.shape[1]
+        means = np.zeros((k, d))
+        stds = np.zeros((k, d))
+        quantiles = np.zeros((k, 3, d))
+        sizes = np.zeros(k, dtype=int)
+        for c in range(k):
+            members = X[labels == c]
+            sizes[c] = len(members)
+            if len(members) == 0:
+                means[c] = centroids[c]
+                quantiles[c] = centroids[c]
+                continue
+            means[c] = members.mean(axis=0)
+            stds[c] = members.std(axis=0)
+            quantiles[c] = np.quantile(members, [0.25, 0.5, 0.75], axis=0)
+
+        sq_norms = (centroids_scaled ** 2).sum(axis=1)
+        boundary_normals = 2.0 * (centroids_scaled[None, :, :] - centroids_scaled[:, None, :])
+        boundary_offsets = sq_norms[:, None] - sq_norms[None, :]
+
+        return {
+            "feature_names": list(self.feature_names),
+            "centroids": centroids,
+            "centroids_scaled": centroids_scaled,
+            "means": means,
+            "stds": stds,
+            "quantiles": quantiles,
+            "sizes": sizes,
+            "feature_min": X.min(axis=0),
+            "feature_max": X.max(axis=0),
+            "boundary_normals": boundary_normals,
+            "boundary_offsets": boundary_offsets,
+        }
+
+    # --------------------------------------------------
+    # Vecteur de features d'un profil (sans relecture des données)
+    # --------------------------------------------------
+    def embedding_for_profile(self, profile):
+        """ Retourne le vecteur (non standardisé) d'un profil déjà calculé """
+        if profile.get("student_type") == "existing":
+            row = self._feature_row(profile.get("student_id"))
+            if row is not None:
+                metrics.inc("profiling_feature_cache_hits")
+                return self.features[row]
+            metrics.inc("profiling_feature_cache_misses")
+            return None
+
+        style_num = self.learning_style_mapping.get(profile.get("learning_style"), 2)
+        est_score = profile.get("estimated_score", 50.0)
+        return np.array([est_score, 0.0, 0.0, 0.0, style_num, 0], dtype=float)
+
 
     # --------------------------------------------------
     # API principale appelée par l’Interface Agent
     # --------------------------------------------------
+    @metrics.timed("profiling.profile_student")
     def profile_student(self, input_json):
 
         student_type = input_json.get("student_type")
@@ -119,7 +256,12 @@ class ProfilingAgent:
         if student_type == "existing":
             student_id = input_json.get("student_id")
 
-            emb = self._create_embedding_existing(student_id)
+            row = self._feature_row(student_id)
+            if row is not None:
+                metrics.inc("profiling_feature_cache_hits")
+                emb = self.features[row].tolist()
+            else:
+                emb = self._create_embedding_existing(student_id)
 
             if emb is None:
                 return {
@@ -138,7 +280,7 @@ class ProfilingAgent:
                 "student_id": int(student_id),
                 "mean_score": mean_score,
                 "total_clicks": int(emb[2]),
-                "learning_style": list(self.learning_style_mapping.keys())[emb[4]],
+                "learning_style": list(self.learning_style_mapping.keys())[int(emb[4])],
                 "cluster_id": cluster,
                 "risk_level": risk
             }
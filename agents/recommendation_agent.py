@@ -1,7 +1,11 @@
+from utils import metrics
+
+
 class RecommendationAgent:
     def __init__(self, data):
         self.assessments = data["assessments"]
 
+    @metrics.timed("recommendation.recommend")
     def recommend(self, profile, planned_path, generated_content=None):
         style = profile.get("learning_style", "practice")
         risk = profile.get("risk_level", "medium")
@@ -0,0 +1,145 @@
+# shared_dataset.py
+# Jeu de données partagé entre processus workers (mémoire mappée, zéro copie)
+# Un process "loader" publie les DataFrames OULAD nettoyés et les tables du
+# Profiling Agent dans un dossier (idéalement sur tmpfs, ex. /dev/shm/oulad) ;
+# chaque worker s'y attache via np.load(mmap_mode="r") : les pages sont
+# partagées par le cache du noyau, le RSS marginal d'un worker ne dépend
+# pas de la taille du dataset.
+#
+# Usage :
+#   python shared_dataset.py publish --data ../data/oulad/ --out /dev/shm/oulad
+#   OULAD_SHARED_DIR=/dev/shm/oulad gunicorn -w 8 orchestrator_agent:app
+
+import argparse
+import copy
+import json
+import os
+import pickle
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from dataloader import OULADDataLoader
+from profiling_agent import ProfilingAgent
+from utils import metrics
+
+MANIFEST = "manifest.json"
+TABLES = ["student_info", "student_assessment", "student_vle", "assessments", "courses"]
+PROFILING_ARRAYS = ["features", "feature_ids", "labels"]
+
+
+# --------------------------------------------------
+# Publication (process loader)
+# --------------------------------------------------
+def _write_table(df, table_dir):
+    """ Une colonne = un fichier .npy ; colonnes texte → codes catégoriels + catégories """
+    os.makedirs(table_dir, exist_ok=True)
+    columns = []
+    for col in df.columns:
+        values = df[col]
+        if pd.api.types.is_numeric_dtype(values) or pd.api.types.is_bool_dtype(values):
+            np.save(os.path.join(table_dir, f"{col}.npy"), np.ascontiguousarray(values.to_numpy()))
+            columns.append({"name": col, "kind": "numeric"})
+        else:
+            cat = pd.Categorical(values.astype(object).where(values.notna(), None))
+            codes = cat.codes  # int8/int16/... selon le nombre de catégories
+            np.save(os.path.join(table_dir, f"{col}.npy"), codes)
+            columns.append({"name": col, "kind": "categorical",
+                            "categories": [str(c) for c in cat.categories]})
+    return {"rows": len(df), "columns": columns}
+
+
+def publish(data, profiling_agent, shared_dir):
+    """ Écrit data (dict de DataFrames) + tables précalculées du Profiling Agent dans shared_dir """
+    tmp_dir = shared_dir.rstrip("/") + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    manifest = {"tables": {}, "profiling": {}}
+    for name in TABLES:
+        manifest["tables"][name] = _write_table(data[name], os.path.join(tmp_dir, name))
+
+    precomputed = profiling_agent.export_precomputed()
+    for name in PROFILING_ARRAYS:
+        np.save(os.path.join(tmp_dir, f"profiling_{name}.npy"), np.ascontiguousarray(precomputed[name]))
+        manifest["profiling"][name] = f"profiling_{name}.npy"
+
+    # Modèles : seulement les paramètres (labels_ de KMeans retirés, déjà dans profiling_labels.npy)
+    kmeans = copy.copy(precomputed["kmeans"])
+    if hasattr(kmeans, "labels_"):
+        del kmeans.labels_
+    with open(os.path.join(tmp_dir, "profiling_models.pkl"), "wb") as f:
+        pickle.dump({"scaler": precomputed["scaler"], "kmeans": kmeans,
+                     "cluster_stats": precomputed["cluster_stats"]}, f)
+
+    # Le manifeste est écrit en dernier, puis le dossier est renommé atomiquement
+    with open(os.path.join(tmp_dir, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2)
+    shutil.rmtree(shared_dir, ignore_errors=True)
+    os.rename(tmp_dir, shared_dir)
+    print(f"✅ Dataset partagé publié : {shared_dir}")
+    return shared_dir
+
+
+# --------------------------------------------------
+# Attachement (process workers)
+# --------------------------------------------------
+def _read_table(table_dir, spec):
+    columns = {}
+    for col in spec["columns"]:
+        arr = np.load(os.path.join(table_dir, f"{col['name']}.npy"), mmap_mode="r")
+        if col["kind"] == "categorical":
+            dtype = pd.CategoricalDtype(col["categories"])
+            columns[col["name"]] = pd.Categorical.from_codes(arr, dtype=dtype, validate=False)
+        else:
+            columns[col["name"]] = arr
+    return pd.DataFrame(columns, copy=False)
+
+
+@metrics.timed("shared_dataset.attach")
+def attach(shared_dir):
+    """
+    Retourne (data, precomputed) :
+    - data : dict de DataFrames adossés aux fichiers mappés (lecture seule)
+    - precomputed : à passer à ProfilingAgent(data, precomputed=...)
+    """
+    manifest_path = os.path.join(shared_dir, MANIFEST)
+    if not os.path.exists(manifest_path):
+        raise FileNotFoundError(
+            f"Aucun dataset partagé dans {shared_dir} : lancer d'abord "
+            f"`python shared_dataset.py publish --out {shared_dir}`"
+        )
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+
+    data = {
+        name: _read_table(os.path.join(shared_dir, name), spec)
+        for name, spec in manifest["tables"].items()
+    }
+
+    precomputed = {
+        name: np.load(os.path.join(shared_dir, filename), mmap_mode="r")
+        for name, filename in manifest["profiling"].items()
+    }
+    with open(os.path.join(shared_dir, "profiling_models.pkl"), "rb") as f:
+        precomputed.update(pickle.load(f))
+
+    print(f"✅ Dataset partagé attaché : {shared_dir}")
+    return data, precomputed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Dataset OULAD partagé entre workers")
+    sub = parser.add_subparsers(dest="command", required=True)
+    pub = sub.add_parser("publish", help="charger OULAD, entraîner le profiling et publier")
+    pub.add_argument("--data", default="../data/oulad/", help="dossier des CSV OULAD")
+    pub.add_argument("--out", required=True, help="dossier partagé (ex. /dev/shm/oulad)")
+    args = parser.parse_args(argv)
+
+    data = OULADDataLoader(args.data).load_all()
+    publish(data, ProfilingAgent(data), args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+# utils/metrics.py
+# Instrumentation légère : spans chronométrés, compteurs, export Prometheus,
+# timings par requête et profileur par échantillonnage (opt-in)
+#
+# Activation par variables d'environnement :
+#   AGENTS_METRICS=1            → spans et compteurs actifs (sinon no-op)
+#   AGENTS_PROFILE_DIR=/chemin  → échantillonnage des piles pendant les requêtes
+#   AGENTS_PROFILE_RATE=0.1     → fraction des requêtes profilées (défaut 1.0)
+#   AGENTS_PROFILE_INTERVAL=0.005 → période d'échantillonnage en secondes
+
+import contextvars
+import os
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+from functools import wraps
+
+ENABLED = os.environ.get("AGENTS_METRICS", "0") == "1"
+PROFILE_DIR = os.environ.get("AGENTS_PROFILE_DIR")
+PROFILE_RATE = float(os.environ.get("AGENTS_PROFILE_RATE", "1.0"))
+PROFILE_INTERVAL = float(os.environ.get("AGENTS_PROFILE_INTERVAL", "0.005"))
+
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_lock = threading.Lock()
+_spans = {}  # nom → [compteurs par bucket..., count, sum]
+_counters = defaultdict(float)
+_request_spans = contextvars.ContextVar("request_spans", default=None)
+
+
+def enable(flag=True):
+    global ENABLED
+    ENABLED = flag
+
+
+def reset():
+    with _lock:
+        _spans.clear()
+        _counters.clear()
+
+
+# --------------------------------------------------
+# Spans
+# --------------------------------------------------
+def _record(name, seconds):
+    with _lock:
+        stats = _spans.get(name)
+        if stats is None:
+            stats = _spans[name] = [0] * (len(BUCKETS) + 2)
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                stats[i] += 1
+        stats[-2] += 1
+        stats[-1] += seconds
+
+    per_request = _request_spans.get()
+    if per_request is not None:
+        per_request[name] = per_request.get(name, 0.0) + seconds
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("name", "t0")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        _record(self.name, time.perf_counter() - self.t0)
+        return False
+
+
+def span(name):
+    """ Context manager chronométrant un bloc (no-op si les métriques sont désactivées) """
+    if not ENABLED:
+        return _NULL_SPAN
+    return _Span(name)
+
+
+def timed(name):
+    """ Décorateur : span autour de chaque appel de la fonction """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return fn(*args, **kwargs)
+            with _Span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# --------------------------------------------------
+# Compteurs
+# --------------------------------------------------
+def inc(name, value=1):
+    if not ENABLED:
+        return
+    with _lock:
+        _counters[name] += value
+
+
+# --------------------------------------------------
+# Timings par requête
+# --------------------------------------------------
+def start_request():
+    if not ENABLED:
+        return None
+    return _request_spans.set({})
+
+
+def end_request(token):
+    """ Retourne {span: secondes} pour la requête courante """
+    if token is None:
+        return {}
+    spans = _request_spans.get() or {}
+    _request_spans.reset(token)
+    return spans
+
+
+def server_timing_header(spans):
+    return ", ".join(f"{name};dur={seconds * 1000.0:.2f}" for name, seconds in spans.items())
+
+
+# --------------------------------------------------
+# Export Prometheus (format texte)
+# --------------------------------------------------
+def render_prometheus():
+    lines = []
+    with _lock:
+        spans = {name: list(stats) for name, stats in _spans.items()}
+        counters = dict(_counters)
+
+    lines.append("# HELP agents_span_seconds Durée des spans instrumentés")
+    lines.append("# TYPE agents_span_seconds histogram")
+    for name in sorted(spans):
+        stats = spans[name]
+        for i, bound in enumerate(BUCKETS):
+            lines.append(f'agents_span_seconds_bucket{{span="{name}",le="{bound}"}} {stats[i]}')
+        lines.append(f'agents_span_seconds_bucket{{span="{name}",le="+Inf"}} {stats[-2]}')
+        lines.append(f'agents_span_seconds_sum{{span="{name}"}} {stats[-1]:.6f}')
+        lines.append(f'agents_span_seconds_count{{span="{name}"}} {stats[-2]}')
+
+    for name in sorted(counters):
+        metric = f"agents_{name}_total"
+        lines.append(f"# TYPE {metric} counter")
+        lines.append(f"{metric} {counters[name]:g}")
+
+    return "\n".join(lines) + "\n"
+
+
+# --------------------------------------------------
+# Profileur par échantillonnage (opt-in)
+# --------------------------------------------------
+class StackSampler:
+    """
+    Échantillonne périodiquement la pile d'un thread et compte les piles
+    au format "collapsed" (compatible flamegraph.pl / speedscope).
+    """
+
+    def __init__(self, thread_id=None, interval=PROFILE_INTERVAL):
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval = interval
+        self.stacks = defaultdict(int)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self
+
+    def write(self, path):
+        with open(path, "w") as f:
+            for stack, count in sorted(self.stacks.items()):
+                f.write(f"{stack} {count}\n")
+        return path
+
+
+def maybe_start_sampler():
+    """ Démarre un StackSampler si AGENTS_PROFILE_DIR est défini (selon AGENTS_PROFILE_RATE) """
+    if not PROFILE_DIR or random.random() >= PROFILE_RATE:
+        return None
+    return StackSampler().start()
+
+
+def finish_sampler(sampler, label="request"):
+    if sampler is None:
+        return None
+    sampler.stop()
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = os.path.join(PROFILE_DIR, f"{label}_{time.strftime('%Y%m%d-%H%M%S')}_{id(sampler):x}.collapsed")
+    return sampler.write(path)
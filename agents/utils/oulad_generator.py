@@ -0,0 +1,243 @@
+# utils/oulad_generator.py
+# Générateur OULAD synthétique à grande échelle (tests de charge / profiling)
+# Entrée : studentInfo, studentRegistration, assessments, courses (fichiers réels)
+# Sortie : studentAssessment.csv + studentVle.csv cohérents avec les IDs et modules
+#          existants, plus les 4 fichiers d'origine (répliqués si scale > 1)
+#
+# Usage (depuis agents/) :
+#   python -m utils.oulad_generator --out ../data/oulad_x10 --scale 10 --workers 8 --seed 42
+#
+# Déterminisme : chaque chunk a sa propre graine dérivée de (seed, index du chunk)
+# et les chunks sont concaténés dans l'ordre → sortie identique quel que soit --workers.
+
+import argparse
+import math
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Volumes moyens de l'OULAD réel (≈ 10.6 M lignes VLE pour 32 593 inscriptions)
+VLE_ROWS_PER_REGISTRATION = 327
+
+# Profil par résultat final : (proba de rendre un assessment, score ~ Beta(a, b), activité VLE relative)
+RESULT_PROFILES = {
+    "Distinction": (0.98, (9.0, 1.5), 1.6),
+    "Pass": (0.95, (5.0, 2.0), 1.2),
+    "Fail": (0.70, (2.5, 2.5), 0.7),
+    "Withdrawn": (0.60, (3.0, 2.5), 0.4),
+}
+DEFAULT_PROFILE = RESULT_PROFILES["Pass"]
+
+ASSESSMENT_COLUMNS = ["id_assessment", "id_student", "date_submitted", "is_banked", "score"]
+VLE_COLUMNS = ["code_module", "code_presentation", "id_student", "id_site", "date", "sum_click"]
+
+
+# --------------------------------------------------
+# Chargement des tables de référence
+# --------------------------------------------------
+def load_reference(data_path):
+    info = pd.read_csv(os.path.join(data_path, "studentInfo.csv"))
+    registration = pd.read_csv(os.path.join(data_path, "studentRegistration.csv"), na_values="?")
+    assessments = pd.read_csv(os.path.join(data_path, "assessments.csv"), na_values="?")
+    courses = pd.read_csv(os.path.join(data_path, "courses.csv"))
+    return info, registration, assessments, courses
+
+
+def replicate(info, registration, scale):
+    """ Réplique les inscriptions `scale` fois avec des id_student décalés (id + r × stride) """
+    if scale <= 1:
+        return info, registration
+    stride = 10 ** math.ceil(math.log10(info["id_student"].max() + 1))
+    infos, regs = [], []
+    for r in range(scale):
+        infos.append(info.assign(id_student=info["id_student"] + r * stride))
+        regs.append(registration.assign(id_student=registration["id_student"] + r * stride))
+    return pd.concat(infos, ignore_index=True), pd.concat(regs, ignore_index=True)
+
+
+def _registrations(info, registration, courses):
+    keys = ["code_module", "code_presentation", "id_student"]
+    regs = info[keys + ["final_result"]].merge(
+        registration[keys + ["date_unregistration"]], on=keys, how="left"
+    )
+    regs = regs.merge(courses, on=["code_module", "code_presentation"], how="left")
+    regs["module_presentation_length"] = regs["module_presentation_length"].fillna(260)
+    return regs
+
+
+# --------------------------------------------------
+# Génération d'un chunk (exécuté dans un process worker)
+# --------------------------------------------------
+def _chunk_rng(seed, chunk_idx):
+    return np.random.default_rng(np.random.SeedSequence(entropy=seed, spawn_key=(chunk_idx,)))
+
+
+def _generate_assessments(regs, assessments_by_pres, rng):
+    frames = []
+    for (module, presentation), grp in regs.groupby(["code_module", "code_presentation"], sort=False):
+        ass = assessments_by_pres.get((module, presentation))
+        if ass is None:
+            continue
+        n_reg, n_ass = len(grp), len(ass["id_assessment"])
+        length = grp["module_presentation_length"].to_numpy()
+        # Examens sans date → fin de présentation
+        ass_date = np.where(np.isnan(ass["date"]), length[:, None], ass["date"][None, :])
+
+        profiles = [RESULT_PROFILES.get(r, DEFAULT_PROFILE) for r in grp["final_result"]]
+        p_submit = np.array([p[0] for p in profiles])
+        beta_a = np.array([p[1][0] for p in profiles])
+        beta_b = np.array([p[1][1] for p in profiles])
+
+        submitted = rng.random((n_reg, n_ass)) < p_submit[:, None]
+        unreg = grp["date_unregistration"].to_numpy()
+        submitted &= ~(ass_date > np.where(np.isnan(unreg), np.inf, unreg)[:, None])
+
+        scores = np.round(100.0 * rng.beta(beta_a[:, None], beta_b[:, None], (n_reg, n_ass)))
+        scores[rng.random((n_reg, n_ass)) < 0.001] = np.nan  # scores manquants ("?")
+        date_submitted = np.maximum(0, ass_date + np.round(rng.normal(-2.0, 4.0, (n_reg, n_ass))))
+        is_banked = (rng.random((n_reg, n_ass)) < 0.01).astype(int)
+
+        rows, cols = np.nonzero(submitted)
+        frames.append(pd.DataFrame({
+            "id_assessment": ass["id_assessment"][cols],
+            "id_student": grp["id_student"].to_numpy()[rows],
+            "date_submitted": date_submitted[rows, cols].astype(int),
+            "is_banked": is_banked[rows, cols],
+            "score": pd.array(scores[rows, cols], dtype="Int64"),
+        }))
+    if not frames:
+        return pd.DataFrame(columns=ASSESSMENT_COLUMNS)
+    return pd.concat(frames, ignore_index=True)
+
+
+def _generate_vle(regs, site_offsets, vle_rows_per_registration, rng):
+    activity = np.array([RESULT_PROFILES.get(r, DEFAULT_PROFILE)[2] for r in regs["final_result"]])
+    # Nombre de lignes par inscription : binomiale négative (forte dispersion comme dans l'OULAD)
+    mean_rows = vle_rows_per_registration * activity
+    counts = rng.negative_binomial(2, 2.0 / (2.0 + mean_rows))
+    total = int(counts.sum())
+    idx = np.repeat(np.arange(len(regs)), counts)
+
+    length = regs["module_presentation_length"].to_numpy()
+    unreg = regs["date_unregistration"].to_numpy()
+    end = np.where(np.isnan(unreg), length, np.clip(unreg, -9, length))
+    dates = np.floor(-10 + rng.random(total) * (end[idx] + 10)).astype(int)
+
+    # Sites : pool de 200 ressources par présentation, popularité décroissante
+    site_rank = np.floor(200 * rng.random(total) ** 2.5).astype(int)
+    offsets = np.array([
+        site_offsets.get((m, p), 0)
+        for m, p in zip(regs["code_module"], regs["code_presentation"])
+    ])
+
+    return pd.DataFrame({
+        "code_module": regs["code_module"].to_numpy()[idx],
+        "code_presentation": regs["code_presentation"].to_numpy()[idx],
+        "id_student": regs["id_student"].to_numpy()[idx],
+        "id_site": offsets[idx] + site_rank,
+        "date": dates,
+        "sum_click": rng.geometric(0.27, total),
+    })
+
+
+def _generate_chunk(task):
+    chunk_idx, regs, assessments_by_pres, site_offsets, vle_rows_per_registration, seed, parts_dir = task
+    rng = _chunk_rng(seed, chunk_idx)
+
+    ass_path = os.path.join(parts_dir, f"studentAssessment-{chunk_idx:05d}.csv")
+    vle_path = os.path.join(parts_dir, f"studentVle-{chunk_idx:05d}.csv")
+    student_assessment = _generate_assessments(regs, assessments_by_pres, rng)
+    student_assessment.to_csv(ass_path, index=False, header=False, na_rep="?", columns=ASSESSMENT_COLUMNS)
+    student_vle = _generate_vle(regs, site_offsets, vle_rows_per_registration, rng)
+    student_vle.to_csv(vle_path, index=False, header=False, columns=VLE_COLUMNS)
+    return chunk_idx, ass_path, vle_path, len(student_assessment), len(student_vle)
+
+
+def _concat_parts(paths, columns, out_path):
+    with open(out_path, "wb") as out:
+        out.write((",".join(columns) + "\n").encode())
+        for path in paths:
+            with open(path, "rb") as part:
+                shutil.copyfileobj(part, out, length=16 * 1024 * 1024)
+
+
+# --------------------------------------------------
+# API principale
+# --------------------------------------------------
+def generate(data_path, out_dir, scale=1, seed=42, workers=None, chunk_size=2000,
+             vle_rows_per_registration=VLE_ROWS_PER_REGISTRATION):
+    """
+    Génère un jeu OULAD complet dans out_dir.
+    Retourne {"registrations", "chunks", "student_assessment_rows", "student_vle_rows"}.
+    """
+    info, registration, assessments, courses = load_reference(data_path)
+    info, registration = replicate(info, registration, scale)
+    regs = _registrations(info, registration, courses)
+
+    assessments_by_pres = {
+        key: {
+            "id_assessment": grp["id_assessment"].to_numpy(),
+            "date": grp["date"].to_numpy(dtype=float),
+        }
+        for key, grp in assessments.groupby(["code_module", "code_presentation"])
+    }
+    site_offsets = {
+        (m, p): 500000 + 1000 * i
+        for i, (m, p) in enumerate(zip(courses["code_module"], courses["code_presentation"]))
+    }
+
+    os.makedirs(out_dir, exist_ok=True)
+    parts_dir = tempfile.mkdtemp(prefix="oulad_parts_", dir=out_dir)
+    tasks = [
+        (i, regs.iloc[start:start + chunk_size], assessments_by_pres, site_offsets,
+         vle_rows_per_registration, seed, parts_dir)
+        for i, start in enumerate(range(0, len(regs), chunk_size))
+    ]
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = sorted(pool.map(_generate_chunk, tasks))
+
+        _concat_parts([r[1] for r in results], ASSESSMENT_COLUMNS,
+                      os.path.join(out_dir, "studentAssessment.csv"))
+        _concat_parts([r[2] for r in results], VLE_COLUMNS,
+                      os.path.join(out_dir, "studentVle.csv"))
+    finally:
+        shutil.rmtree(parts_dir, ignore_errors=True)
+
+    info.to_csv(os.path.join(out_dir, "studentInfo.csv"), index=False)
+    registration.to_csv(os.path.join(out_dir, "studentRegistration.csv"), index=False, na_rep="?")
+    assessments.to_csv(os.path.join(out_dir, "assessments.csv"), index=False, na_rep="?")
+    courses.to_csv(os.path.join(out_dir, "courses.csv"), index=False)
+
+    return {
+        "registrations": len(regs),
+        "chunks": len(tasks),
+        "student_assessment_rows": int(sum(r[3] for r in results)),
+        "student_vle_rows": int(sum(r[4] for r in results)),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Génère studentAssessment/studentVle synthétiques")
+    parser.add_argument("--data", default="../data/OULAD", help="dossier des fichiers OULAD de référence")
+    parser.add_argument("--out", required=True, help="dossier de sortie")
+    parser.add_argument("--scale", type=int, default=1, help="facteur de réplication des inscriptions")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=2000, help="inscriptions par chunk")
+    parser.add_argument("--vle-rows", type=int, default=VLE_ROWS_PER_REGISTRATION,
+                        help="lignes VLE moyennes par inscription")
+    args = parser.parse_args(argv)
+
+    summary = generate(args.data, args.out, scale=args.scale, seed=args.seed, workers=args.workers,
+                       chunk_size=args.chunk_size, vle_rows_per_registration=args.vle_rows)
+    print(f"✅ OULAD synthétique écrit dans {args.out} : {summary}")
+
+
+if __name__ == "__main__":
+    main()
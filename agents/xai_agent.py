@@ -1,46 +1,174 @@
+import numpy as np
+from utils import metrics
+
+
 class XAIAgent:
     def __init__(self, profiling_agent):
         self.profiling_agent = profiling_agent
 
+    # --------------------------------------------------
+    # Explication locale à partir des tables par cluster
+    # --------------------------------------------------
+    def _cluster_explanation(self, profile):
+        """
+        Contributions, marge et contrefactuels calculés uniquement par
+        arithmétique vectorielle sur ProfilingAgent.cluster_stats
+        (pas de ré-entraînement ni de parcours des DataFrames).
+        """
+        agent = self.profiling_agent
+        stats = agent.cluster_stats
+        cluster_id = profile.get("cluster_id")
+        x = agent.embedding_for_profile(profile)
+        if stats is None or cluster_id is None or x is None:
+            return None
+
+        names = stats["feature_names"]
+        scale = agent.scaler.scale_
+        z = (x - agent.scaler.mean_) / scale
+        centers = stats["centroids_scaled"]
+        c = int(cluster_id)
+
+        # Écart au centroïde (unités d'origine)
+        delta = x - stats["centroids"][c]
+
+        # Marges vers chaque autre cluster : |z - c_j|² - |z - c_i|²
+        sq_dist = ((z[None, :] - centers) ** 2)
+        per_feature_margin = sq_dist - sq_dist[c]
+        margins = per_feature_margin.sum(axis=1)
+        margins[c] = np.inf
+        rival = int(np.argmin(margins)) if len(margins) > 1 else c
+
+        contributions = {}
+        if rival != c:
+            for name, value in zip(names, per_feature_margin[rival]):
+                contributions[name] = round(float(value), 3)
+
+        # Position dans la distribution du cluster (quantiles précalculés)
+        q25, q50, q75 = stats["quantiles"][c]
+        positions = {}
+        for i, name in enumerate(names):
+            if x[i] < q25[i]:
+                positions[name] = "bas"
+            elif x[i] > q75[i]:
+                positions[name] = "élevé"
+            else:
+                positions[name] = "typique"
+
+        # Contrefactuels : variation d'une seule feature pour franchir la frontière c → rival
+        counterfactuals = []
+        if rival != c:
+            w = stats["boundary_normals"][c, rival]
+            b = stats["boundary_offsets"][c, rival]
+            g = float(z @ w + b)
+            for i, name in enumerate(names):
+                # learning_style est catégoriel : pas de seuil continu
+                if name == "learning_style" or abs(w[i]) < 1e-9:
+                    continue
+                step_z = -g / w[i]
+                z_cf = z.copy()
+                z_cf[i] += step_z * 1.001
+                new_cluster = int(np.argmin(((z_cf[None, :] - centers) ** 2).sum(axis=1)))
+                if new_cluster != rival:
+                    continue
+                threshold = x[i] + step_z * scale[i]
+                if not stats["feature_min"][i] <= threshold <= stats["feature_max"][i]:
+                    continue
+                counterfactuals.append({
+                    "feature": name,
+                    "current": round(float(x[i]), 2),
+                    "threshold": round(float(threshold), 2),
+                    "target_cluster": rival
+                })
+            counterfactuals.sort(key=lambda cf: abs(cf["threshold"] - cf["current"]) / scale[names.index(cf["feature"])])
+
+        return {
+            "cluster_id": c,
+            "cluster_size": int(stats["sizes"][c]),
+            "centroid": {n: round(float(v), 2) for n, v in zip(names, stats["centroids"][c])},
+            "delta_to_centroid": {n: round(float(v), 2) for n, v in zip(names, delta)},
+            "position_in_cluster": positions,
+            "nearest_rival_cluster": rival,
+            "nearest_centroid_margin": round(float(margins[rival]), 3) if rival != c else None,
+            "margin_contributions": contributions,
+            "counterfactual_thresholds": counterfactuals
+        }
+
+    @metrics.timed("xai.explain")
     def explain(self, profile, planned_path, recommendation_results):
         style = profile.get("learning_style", "practice")
         risk = profile.get("risk_level", "medium")
-        mean_score = profile.get("mean_score", 50.0)
+        mean_score = profile.get("mean_score", profile.get("estimated_score", 50.0))
         cluster_id = profile.get("cluster_id")
 
         explanations = {}
+        local = self._cluster_explanation(profile)
 
         # Profil
         feature_importance = {
-            "mean_score": f"Votre score moyen élevé ({mean_score}) montre une bonne maîtrise – on peut vous proposer des étapes ambitieuses.",
-            "learning_style": f"Votre style '{style}' nous pousse à privilégier les quizzes et exercices pratiques.",
-            "risk_level": f"Risque '{risk}' → vous pouvez avancer sans trop de contraintes.",
-            "total_clicks": f"Votre activité ({profile.get('total_clicks', 'inconnue')}) indique une bonne régularité."
+            "mean_score": f"Votre score moyen ({mean_score}) sert de point de départ pour choisir la difficulté des étapes.",
+            "learning_style": f"Votre style '{style}' oriente le choix entre quizzes, textes et exercices pratiques.",
+            "risk_level": f"Risque '{risk}' → il ajuste la place des TMA et examens dans votre parcours.",
+            "total_clicks": f"Votre activité ({profile.get('total_clicks', 'inconnue')}) reflète votre régularité sur la plateforme."
         }
+        if local:
+            centroid = local["centroid"]
+            positions = local["position_in_cluster"]
+            for name in ["mean_score", "total_clicks"]:
+                feature_importance[name] += (
+                    f" Moyenne du cluster : {centroid[name]} (vous êtes {positions[name]} dans votre groupe)."
+                )
+            if local["margin_contributions"]:
+                top = max(local["margin_contributions"].items(), key=lambda kv: abs(kv[1]))
+                feature_importance["cluster_assignment"] = (
+                    f"La caractéristique qui vous distingue le plus du cluster {local['nearest_rival_cluster']} "
+                    f"est '{top[0]}'."
+                )
         explanations["feature_importance"] = feature_importance
-        explanations["profil_summary"] = f"Vous êtes classé dans le cluster {cluster_id} : étudiants performants, réguliers et orientés pratique."
+
+        if local:
+            explanations["profil_summary"] = (
+                f"Vous êtes classé dans le cluster {cluster_id} ({local['cluster_size']} étudiants, "
+                f"score moyen du groupe {local['centroid']['mean_score']})."
+            )
+        else:
+            explanations["profil_summary"] = f"Vous êtes classé dans le cluster {cluster_id}."
 
         # Chaîne globale
         chain = [
-            "On commence par un parcours logique basé sur les données réelles (de BBB à GGG).",
-            f"Votre style '{style}' favorise fortement les quizzes interactifs et les TMA.",
-            f"Comme votre risque est '{risk}' et votre score élevé, on priorise les premiers modules sans pénalité.",
+            f"Le parcours suit {len(planned_path)} étapes construites à partir des données OULAD.",
+            f"Votre style '{style}' influence la priorité des quizzes interactifs et des TMA.",
+            f"Votre niveau de risque '{risk}' module la pénalité appliquée aux évaluations difficiles.",
             "Les quizzes générés spécialement pour vous sont très adaptés → ils apparaissent souvent en priorité."
         ]
+        if local and local["nearest_centroid_margin"] is not None:
+            chain.append(
+                f"Votre profil est à une marge de {local['nearest_centroid_margin']} du cluster "
+                f"{local['nearest_rival_cluster']} (plus la marge est faible, plus le classement est incertain)."
+            )
 
-        # Contrefactuels (simples et utiles)
-        counterfactuals = [
-            f"Si ton risque était élevé (par exemple si tu avais moins de temps ou plus de difficulté), je te proposerais d’abord des quizzes très courts et faciles pour reprendre confiance.",
-            f"Si tu préférais apprendre par la lecture plutôt que par la pratique, je mettrais en avant des textes détaillés et des explications longues au lieu des quizzes interactifs.",
-            f"Si ton score moyen était plus bas (moins de 60), je commencerais par beaucoup plus de petits quizzes de révision pour t’aider à remonter ton niveau avant de passer aux modules difficiles."
-        ]
+        # Contrefactuels
+        counterfactuals = []
+        if local:
+            for cf in local["counterfactual_thresholds"][:3]:
+                direction = "atteignait" if cf["threshold"] > cf["current"] else "descendait à"
+                counterfactuals.append(
+                    f"Si votre '{cf['feature']}' {direction} {cf['threshold']} (actuellement {cf['current']}), "
+                    f"vous seriez classé dans le cluster {cf['target_cluster']}."
+                )
+        if not counterfactuals:
+            counterfactuals = [
+                "Si ton risque était élevé (par exemple si tu avais moins de temps ou plus de difficulté), je te proposerais d’abord des quizzes très courts et faciles pour reprendre confiance.",
+                "Si tu préférais apprendre par la lecture plutôt que par la pratique, je mettrais en avant des textes détaillés et des explications longues au lieu des quizzes interactifs.",
+                "Si ton score moyen était plus bas (moins de 60), je commencerais par beaucoup plus de petits quizzes de révision pour t’aider à remonter ton niveau avant de passer aux modules difficiles."
+            ]
 
         explanations["global_reasoning"] = {
             "chain": chain,
             "counterfactuals": counterfactuals
         }
+        explanations["cluster_details"] = local
 
         return {
             "explanations": explanations,
-            "method": "Explications globales du système"
-        }
\ No newline at end of file
+            "method": "Explications basées sur les statistiques précalculées des clusters"
+        }
@@ -0,0 +1,276 @@
+# benchmarks/bench_agents.py
+# Benchmarks hors-ligne des chemins critiques des agents
+# Données : OULAD synthétique (synthetic_oulad.py), LLM et embeddings factices
+# Sortie : percentiles de latence, pic mémoire, courbes de montée en charge (JSON)
+#
+# Usage (depuis la racine du dépôt) :
+#   python benchmarks/bench_agents.py --sizes 500,1000,2000 --output bench.json
+#   python benchmarks/bench_agents.py --sizes 500 --compare bench.json
+
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+try:
+    from langchain_core.embeddings import Embeddings
+except ImportError:
+    Embeddings = object
+
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+AGENTS_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "agents"))
+sys.path.insert(0, AGENTS_PATH)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import synthetic_oulad  # noqa: E402
+from dataloader import OULADDataLoader  # noqa: E402
+from profiling_agent import ProfilingAgent  # noqa: E402
+from path_planning_agent import PathPlanningAgent  # noqa: E402
+from recommendation_agent import RecommendationAgent  # noqa: E402
+
+
+# --------------------------------------------------
+# Stubs LLM / embeddings (aucun accès réseau ni modèle)
+# --------------------------------------------------
+class StubEmbeddings(Embeddings):
+    """ Embeddings déterministes dérivés d'un hash du texte """
+
+    def __init__(self, *args, dim=384, **kwargs):
+        self.dim = dim
+
+    def _embed(self, text):
+        seed = int.from_bytes(hashlib.md5(text.encode()).digest()[:4], "little")
+        vec = np.random.default_rng(seed).standard_normal(self.dim).astype("float32")
+        return (vec / np.linalg.norm(vec)).tolist()
+
+    def embed_documents(self, texts):
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+    def __call__(self, text):
+        return self.embed_query(text)
+
+
+class StubLLM:
+    """ Remplace OllamaLocal : réponse JSON fixe, pas de sous-processus """
+
+    RESPONSE = json.dumps({
+        "explanation_path": "Stub explanation.",
+        "learning_objectives": ["objective 1", "objective 2"],
+        "quizzes": [
+            {"number": i, "question": f"How does concept {i} work?", "answer": f"Answer {i}."}
+            for i in range(1, 4)
+        ]
+    })
+
+    def __init__(self, model_name="stub"):
+        self.model = model_name
+
+    def generate(self, prompts):
+        from content_generator_rag import SimpleGeneration, SimpleResponse
+        return SimpleResponse([[SimpleGeneration(self.RESPONSE)] for _ in prompts])
+
+
+# --------------------------------------------------
+# Mesures
+# --------------------------------------------------
+def summarize(samples):
+    ms = np.asarray(samples) * 1000.0
+    return {
+        "n": int(len(ms)),
+        "mean_ms": round(float(ms.mean()), 3),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p90_ms": round(float(np.percentile(ms, 90)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+        "max_ms": round(float(ms.max()), 3),
+    }
+
+
+def measure(fn, repeat):
+    """ Exécute fn `repeat` fois (chronométré), puis une fois sous tracemalloc pour le pic mémoire """
+    samples = []
+    for i in range(repeat):
+        t0 = time.perf_counter()
+        fn(i)
+        samples.append(time.perf_counter() - t0)
+
+    tracemalloc.start()
+    fn(repeat)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    stats = summarize(samples)
+    stats["peak_mem_kb"] = round(peak / 1024.0, 1)
+    return stats
+
+
+def _request_client(data_dir):
+    """ Importe orchestrator_agent avec données synthétiques + stubs et retourne un client Flask """
+    import dataloader
+    import content_generator_rag
+
+    dataloader.OULADDataLoader.__init__.__defaults__ = (data_dir,)
+    content_generator_rag.HuggingFaceEmbeddings = StubEmbeddings
+    content_generator_rag.OllamaLocal = StubLLM
+
+    sys.modules.pop("orchestrator_agent", None)
+    import orchestrator_agent
+    return orchestrator_agent.app.test_client()
+
+
+def bench_size(n_students, n_vle_rows, repeat, fit_repeat, seed, workdir):
+    data_dir = synthetic_oulad.generate(
+        os.path.join(workdir, f"oulad_{n_students}_{n_vle_rows}"),
+        n_students=n_students, n_vle_rows=n_vle_rows, seed=seed
+    )
+    rng = np.random.default_rng(seed)
+    stages = {}
+
+    loader = OULADDataLoader(data_dir)
+    stages["load_all"] = measure(lambda i: OULADDataLoader(data_dir).load_all(), repeat)
+    data = loader.load_all()
+
+    profiling_agent = ProfilingAgent(data)
+    stages["fit_clusters"] = measure(lambda i: profiling_agent._fit_clusters(), fit_repeat)
+
+    ids = rng.choice(data["student_info"]["id_student"].unique(), repeat + 1)
+    stages["profile_student"] = measure(
+        lambda i: profiling_agent.profile_student({"student_type": "existing", "student_id": str(ids[i])}),
+        repeat
+    )
+    profiles = [
+        profiling_agent.profile_student({"student_type": "existing", "student_id": str(sid)})
+        for sid in ids
+    ]
+
+    path_agent = PathPlanningAgent(data)
+    modules = sorted(data["courses"]["code_module"].unique())
+    stages["build_graph"] = measure(
+        lambda i: path_agent._build_graph(start_module=modules[i % len(modules)]), repeat
+    )
+    graph = path_agent._build_graph(start_module=modules[0])
+    stages["a_star_search"] = measure(
+        lambda i: path_agent._a_star_search("Start", "End", profiles[i], graph), repeat
+    )
+    stages["pareto_search"] = measure(
+        lambda i: path_agent.plan_schedule(profiles[i], start_module=modules[i % len(modules)]), repeat
+    )
+    stages["plan_path"] = measure(lambda i: path_agent.plan_path(profiles[i]), repeat)
+
+    planned = path_agent.plan_path(profiles[0])["planned_path"]
+    rec_agent = RecommendationAgent(data)
+    generated = {"quizzes_structured": json.loads(StubLLM.RESPONSE)["quizzes"]}
+    stages["recommend"] = measure(
+        lambda i: rec_agent.recommend(profiles[i], planned, generated_content=generated), repeat
+    )
+
+    try:
+        client = _request_client(data_dir)
+    except ImportError as e:
+        stages["request"] = {"skipped": f"dépendance manquante : {e}"}
+    else:
+        stages["request"] = measure(
+            lambda i: client.post("/", data={"student_type": "existing", "student_id": str(ids[i])}),
+            repeat
+        )
+
+    return {"n_students": n_students, "n_vle_rows": n_vle_rows, "stages": stages}
+
+
+def print_report(runs, baseline=None):
+    base_stages = {}
+    if baseline:
+        for run in baseline.get("runs", []):
+            base_stages[run["n_students"]] = run["stages"]
+
+    for run in runs:
+        print(f"\n=== N={run['n_students']} étudiants, M={run['n_vle_rows']} lignes VLE ===")
+        print(f"{'stage':<18}{'p50 ms':>12}{'p90 ms':>12}{'p99 ms':>12}{'peak KB':>12}{'Δp50':>10}")
+        for name, s in run["stages"].items():
+            if "skipped" in s:
+                print(f"{name:<18}  {s['skipped']}")
+                continue
+            delta = ""
+            ref = base_stages.get(run["n_students"], {}).get(name)
+            if ref and "p50_ms" in ref and ref["p50_ms"] > 0:
+                delta = f"{(s['p50_ms'] / ref['p50_ms'] - 1) * 100:+.1f}%"
+            print(f"{name:<18}{s['p50_ms']:>12.2f}{s['p90_ms']:>12.2f}{s['p99_ms']:>12.2f}"
+                  f"{s['peak_mem_kb']:>12.0f}{delta:>10}")
+
+    if len(runs) > 1:
+        print("\n=== Montée en charge (p50 relatif à la plus petite taille) ===")
+        first = runs[0]["stages"]
+        for name in first:
+            if "p50_ms" not in first[name] or first[name]["p50_ms"] == 0:
+                continue
+            curve = [
+                run["stages"][name]["p50_ms"] / first[name]["p50_ms"]
+                for run in runs if "p50_ms" in run["stages"].get(name, {})
+            ]
+            print(f"{name:<18}" + "".join(f"{x:>8.2f}x" for x in curve))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks hors-ligne des agents")
+    parser.add_argument("--sizes", default="500,1000,2000", help="nombres d'étudiants, séparés par des virgules")
+    parser.add_argument("--vle-per-student", type=int, default=20, help="lignes VLE par étudiant")
+    parser.add_argument("--repeat", type=int, default=20, help="répétitions par étape")
+    parser.add_argument("--fit-repeat", type=int, default=3, help="répétitions pour _fit_clusters")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="fichier JSON de résultats")
+    parser.add_argument("--compare", help="JSON d'un run précédent à comparer")
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    runs = []
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        # Index FAISS et images écrits dans le dossier temporaire
+        os.chdir(workdir)
+        try:
+            for n in sizes:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    runs.append(bench_size(n, n * args.vle_per_student, args.repeat,
+                                           args.fit_repeat, args.seed, workdir))
+        finally:
+            os.chdir(cwd)
+
+    result = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "repeat": args.repeat,
+            "vle_per_student": args.vle_per_student,
+        },
+        "runs": runs,
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(runs, baseline)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"\nRésultats écrits dans {args.output}")
+    return result
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+# benchmarks/bench_embeddings.py
+# Compare les backends d'embeddings du RAG (torch, torch-int8, onnx, onnx-int8)
+# et le stockage FAISS float32 / float16
+# Mesures par backend (process isolé) : temps de chargement, RSS, latence requête
+# (embedding + recherche), accord de récupération top-k avec torch/float32
+#
+# Usage (depuis la racine du dépôt, modèle all-MiniLM-L6-v2 en cache local) :
+#   python benchmarks/bench_embeddings.py --output bench_embeddings.json
+#   python benchmarks/bench_embeddings.py --backends torch,onnx-int8 --docs 2000 --queries 200
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import platform
+import resource
+import sys
+import time
+
+import numpy as np
+
+AGENTS_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "agents"))
+sys.path.insert(0, AGENTS_PATH)
+
+REFERENCE = ("torch", "float32")
+
+TOPICS = {
+    "AAA": ["history", "archaeology", "classical texts", "ancient civilisations"],
+    "BBB": ["social care", "health policy", "community work", "wellbeing"],
+    "CCC": ["algorithms", "data structures", "software engineering", "machine learning"],
+    "DDD": ["algebra", "calculus", "discrete mathematics", "probability"],
+    "EEE": ["mechanics", "electromagnetism", "energy", "engineering simulation"],
+    "FFF": ["genetics", "ecology", "cell biology", "evolution"],
+    "GGG": ["economics", "sociology", "psychology", "political science"],
+}
+TEMPLATES = [
+    "An introduction to {t} with worked examples for {m} students.",
+    "Key concepts in {t}: definitions, exercises and a short summary.",
+    "Practice problems on {t}, from beginner to advanced level.",
+    "How {t} connects to the rest of the {m} curriculum.",
+    "Revision notes on {t} before the tutor-marked assessment.",
+]
+
+
+def build_corpus(n_docs, n_queries, seed):
+    rng = np.random.default_rng(seed)
+    modules = list(TOPICS)
+    docs = []
+    for i in range(n_docs):
+        m = modules[i % len(modules)]
+        t = TOPICS[m][rng.integers(len(TOPICS[m]))]
+        docs.append((TEMPLATES[rng.integers(len(TEMPLATES))].format(t=t, m=m) + f" (part {i})", m))
+    queries = []
+    for _ in range(n_queries):
+        path = list(rng.choice(modules, 3, replace=False))
+        style = rng.choice(["visual", "text", "practice"])
+        risk = rng.choice(["low", "medium", "high"])
+        queries.append(
+            f"Planned path modules: {', '.join(path)}. "
+            f"Student profile: {{'learning_style': '{style}', 'risk_level': '{risk}'}}"
+        )
+    return docs, queries
+
+
+def _rss_mb():
+    # ru_maxrss : Ko sous Linux, octets sous macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+def _run_backend(backend, docs, queries, top_k, queue):
+    """ Exécuté dans un process séparé pour isoler chargement et mémoire """
+    try:
+        import faiss
+        from content_generator_rag import make_embeddings
+
+        rss_before = _rss_mb()
+        t0 = time.perf_counter()
+        embeddings = make_embeddings(backend)
+        embeddings.embed_query("warm-up")
+        load_s = time.perf_counter() - t0
+        rss_after_load = _rss_mb()
+
+        t0 = time.perf_counter()
+        vectors = np.asarray(embeddings.embed_documents([d[0] for d in docs]), dtype="float32")
+        index_s = time.perf_counter() - t0
+        dim = vectors.shape[1]
+
+        results = {}
+        for dtype in ["float32", "float16"]:
+            if dtype == "float16":
+                index = faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_fp16, faiss.METRIC_L2)
+            else:
+                index = faiss.IndexFlatL2(dim)
+            index.add(vectors)
+
+            latencies, neighbours = [], []
+            for q in queries:
+                t0 = time.perf_counter()
+                qv = np.asarray([embeddings.embed_query(q)], dtype="float32")
+                _, ids = index.search(qv, top_k)
+                latencies.append(time.perf_counter() - t0)
+                neighbours.append(ids[0].tolist())
+
+            ms = np.asarray(latencies) * 1000.0
+            results[dtype] = {
+                "query_p50_ms": round(float(np.percentile(ms, 50)), 3),
+                "query_p90_ms": round(float(np.percentile(ms, 90)), 3),
+                "index_bytes": int(faiss.serialize_index(index).nbytes),
+                "neighbours": neighbours,
+            }
+
+        queue.put({
+            "backend": backend,
+            "load_s": round(load_s, 3),
+            "embed_corpus_s": round(index_s, 3),
+            "rss_load_mb": round(rss_after_load - rss_before, 1),
+            "rss_peak_mb": round(_rss_mb(), 1),
+            "dim": int(dim),
+            "storage": results,
+        })
+    except Exception as e:  # dépendance ou modèle absent : reporté, pas bloquant
+        queue.put({"backend": backend, "error": f"{type(e).__name__}: {e}"})
+
+
+def agreement(neighbours, reference):
+    """ Recall@k moyen des voisins par rapport à la référence """
+    scores = [len(set(a) & set(b)) / len(b) for a, b in zip(neighbours, reference) if b]
+    return round(float(np.mean(scores)), 4) if scores else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark des backends d'embeddings du RAG")
+    parser.add_argument("--backends", default="torch,torch-int8,onnx,onnx-int8")
+    parser.add_argument("--docs", type=int, default=1000)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="fichier JSON de résultats")
+    args = parser.parse_args(argv)
+
+    docs, queries = build_corpus(args.docs, args.queries, args.seed)
+    backends = [b for b in args.backends.split(",") if b]
+    if REFERENCE[0] not in backends:
+        backends.insert(0, REFERENCE[0])
+
+    ctx = mp.get_context("spawn")
+    runs = []
+    for backend in backends:
+        queue = ctx.Queue()
+        proc = ctx.Process(target=_run_backend, args=(backend, docs, queries, args.top_k, queue))
+        proc.start()
+        runs.append(queue.get())
+        proc.join()
+
+    reference = next(
+        (r["storage"][REFERENCE[1]]["neighbours"] for r in runs
+         if r["backend"] == REFERENCE[0] and "error" not in r),
+        None
+    )
+
+    print(f"{'backend':<12}{'stockage':<10}{'load s':>8}{'RSS MB':>9}{'p50 ms':>9}{'p90 ms':>9}"
+          f"{'index KB':>10}{'recall@k':>10}")
+    for run in runs:
+        if "error" in run:
+            print(f"{run['backend']:<12}  ignoré : {run['error']}")
+            continue
+        for dtype, s in run["storage"].items():
+            s["recall_vs_reference"] = agreement(s["neighbours"], reference) if reference else None
+            recall = "-" if s["recall_vs_reference"] is None else f"{s['recall_vs_reference']:.3f}"
+            print(f"{run['backend']:<12}{dtype:<10}{run['load_s']:>8.2f}{run['rss_load_mb']:>9.0f}"
+                  f"{s['query_p50_ms']:>9.2f}{s['query_p90_ms']:>9.2f}{s['index_bytes'] / 1024:>10.0f}"
+                  f"{recall:>10}")
+            del s["neighbours"]
+
+    result = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "docs": args.docs,
+            "queries": args.queries,
+            "top_k": args.top_k,
+            "reference": "/".join(REFERENCE),
+        },
+        "runs": runs,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"\nRésultats écrits dans {args.output}")
+    return result
+
+
+if __name__ == "__main__":
+    main()
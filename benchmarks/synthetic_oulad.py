@@ -0,0 +1,110 @@
+# benchmarks/synthetic_oulad.py
+# Générateur OULAD synthétique minimal pour les benchmarks (hors-ligne)
+# Entrée : nombre d'étudiants N, nombre de lignes VLE M, seed
+# Sortie : dossier contenant les 5 CSV attendus par OULADDataLoader
+
+import os
+import numpy as np
+import pandas as pd
+
+REAL_DATA_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "OULAD")
+
+EDUCATION_LEVELS = [
+    "A Level or Equivalent", "HE Qualification", "Lower Than A Level",
+    "No Formal quals", "Post Graduate Qualification"
+]
+EDUCATION_WEIGHTS = [0.43, 0.145, 0.405, 0.01, 0.01]
+
+
+def _catalogue(rng):
+    """ Catalogue courses/assessments : fichiers réels si présents, sinon catalogue généré """
+    courses_csv = os.path.join(REAL_DATA_PATH, "courses.csv")
+    assessments_csv = os.path.join(REAL_DATA_PATH, "assessments.csv")
+    if os.path.exists(courses_csv) and os.path.exists(assessments_csv):
+        return pd.read_csv(courses_csv), pd.read_csv(assessments_csv)
+
+    rows_c, rows_a = [], []
+    next_id = 1000
+    for module in ["AAA", "BBB", "CCC", "DDD", "EEE", "FFF", "GGG"]:
+        for presentation in ["2013J", "2014J"]:
+            length = int(rng.integers(234, 270))
+            rows_c.append({"code_module": module, "code_presentation": presentation,
+                           "module_presentation_length": length})
+            for k in range(5):
+                rows_a.append({"code_module": module, "code_presentation": presentation,
+                               "id_assessment": next_id, "assessment_type": "TMA" if k % 2 == 0 else "CMA",
+                               "date": (k + 1) * length // 6, "weight": 20})
+                next_id += 1
+            rows_a.append({"code_module": module, "code_presentation": presentation,
+                           "id_assessment": next_id, "assessment_type": "Exam",
+                           "date": length, "weight": 100})
+            next_id += 1
+    return pd.DataFrame(rows_c), pd.DataFrame(rows_a)
+
+
+def generate(out_dir, n_students=1000, n_vle_rows=20000, seed=0):
+    """ Écrit un jeu OULAD synthétique dans out_dir et retourne out_dir """
+    rng = np.random.default_rng(seed)
+    os.makedirs(out_dir, exist_ok=True)
+
+    courses, assessments = _catalogue(rng)
+
+    # studentInfo : un enregistrement par étudiant
+    pres_idx = rng.integers(0, len(courses), n_students)
+    student_ids = rng.choice(np.arange(10000, 10000 + 50 * n_students), n_students, replace=False)
+    student_info = pd.DataFrame({
+        "code_module": courses["code_module"].values[pres_idx],
+        "code_presentation": courses["code_presentation"].values[pres_idx],
+        "id_student": student_ids,
+        "gender": rng.choice(["M", "F"], n_students),
+        "region": "Scotland",
+        "highest_education": rng.choice(EDUCATION_LEVELS, n_students, p=EDUCATION_WEIGHTS),
+        "imd_band": "50-60%",
+        "age_band": "0-35",
+        "num_of_prev_attempts": rng.integers(0, 3, n_students),
+        "studied_credits": rng.choice([60, 120, 240], n_students),
+        "disability": "N",
+        "final_result": rng.choice(["Pass", "Fail", "Withdrawn", "Distinction"], n_students),
+    })
+
+    # studentAssessment : les assessments de la présentation suivie par chaque étudiant
+    ass_by_pres = {
+        key: grp["id_assessment"].to_numpy()
+        for key, grp in assessments.groupby(["code_module", "code_presentation"])
+    }
+    sa_students, sa_ids = [], []
+    for sid, mod, pres in zip(student_ids, student_info["code_module"], student_info["code_presentation"]):
+        ids = ass_by_pres.get((mod, pres))
+        if ids is None:
+            continue
+        sa_students.append(np.full(len(ids), sid))
+        sa_ids.append(ids)
+    sa_students = np.concatenate(sa_students) if sa_students else np.array([], dtype=int)
+    sa_ids = np.concatenate(sa_ids) if sa_ids else np.array([], dtype=int)
+    scores = np.clip(rng.normal(70, 18, len(sa_ids)), 0, 100).round()
+    student_assessment = pd.DataFrame({
+        "id_assessment": sa_ids,
+        "id_student": sa_students,
+        "date_submitted": rng.integers(0, 260, len(sa_ids)),
+        "is_banked": 0,
+        "score": scores,
+    })
+
+    # studentVle : M lignes réparties sur les étudiants
+    vle_idx = rng.integers(0, n_students, n_vle_rows)
+    student_vle = pd.DataFrame({
+        "code_module": student_info["code_module"].values[vle_idx],
+        "code_presentation": student_info["code_presentation"].values[vle_idx],
+        "id_student": student_ids[vle_idx],
+        "id_site": rng.integers(500000, 600000, n_vle_rows),
+        "date": rng.integers(-10, 260, n_vle_rows),
+        "sum_click": rng.geometric(0.3, n_vle_rows),
+    })
+
+    student_info.to_csv(os.path.join(out_dir, "studentInfo.csv"), index=False)
+    student_assessment.to_csv(os.path.join(out_dir, "studentAssessment.csv"), index=False)
+    student_vle.to_csv(os.path.join(out_dir, "studentVle.csv"), index=False)
+    assessments.to_csv(os.path.join(out_dir, "assessments.csv"), index=False)
+    courses.to_csv(os.path.join(out_dir, "courses.csv"), index=False)
+
+    return out_dir